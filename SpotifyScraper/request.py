@@ -16,7 +16,6 @@
 # TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-import re
 import requests
 
 __author__ = "Ali Akhtari"
@@ -57,7 +56,7 @@ class Request:
         cookies = {}
         with open(self.cookie_file, 'r') as fp:
             for line in fp:
-                if not re.match(r'^\#', line):
+                if not line.startswith('#'):
                     line_fields = line.strip().split('\t')
                     cookies[line_fields[5]] = line_fields[6]
         return cookies
@@ -27,11 +27,24 @@ __status__ = "Production"
 
 from requests.sessions import Session
 from bs4 import BeautifulSoup
-import yaml
+from bs4.element import Tag
 import eyed3
 import os
 import logging
-from .request import Request
+from functools import lru_cache
+from typing import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from .request import Request  # noqa: F401 -- the docs import Request from this module
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+# The resource script is found with bytes.find on this literal. It is a fixed string, so a regex engine
+# (re, re2 or hyperscan) would only add overhead on top of the same substring search.
+_RESOURCE_SCRIPT_MARK = b'id="resource"'
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -41,48 +54,86 @@ formatter = logging.Formatter('%(levelname)s:%(asctime)s:%(module)s:%(lineno)d:%
 file_handler = logging.FileHandler('logfile_spotify_scraper.log')
 file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
 
 class Scraper:
     def __init__(self, session: Session, log: bool = False):
         self.session = session
         self.log = log
+        # Embed pages are fetched once per url and shared by get_track_url_info, download_cover and
+        # download_preview_mp3, so asking for the info, cover and preview of one track costs a single request.
+        self._embed_pages = {}
+        self._embed_pages_lock = Lock()
+
+    def _get_embed_page(self, url: str) -> bytes:
+        page_content = self._embed_pages.get(url)
+        if page_content is None:
+            # Embed pages are small, so read them whole: a fully read response gives its connection back to the
+            # session's pool, which is worth more than the tail bytes after the resource script.
+            response = self.session.get(url=self._turn_url_to_embed(url=url))
+            page_content = response.content
+            # Error pages (429, 5xx, ...) are returned but not kept, so the next call asks the server again.
+            if response.ok:
+                with self._embed_pages_lock:
+                    if len(self._embed_pages) >= 128:
+                        del self._embed_pages[next(iter(self._embed_pages))]
+                    self._embed_pages[url] = page_content
+        return page_content
 
     @staticmethod
-    def _str_to_json(string: str) -> dict:
-        json_acceptable_string = string.replace('\n', '').strip()
-        converted_string = yaml.load(json_acceptable_string, Loader=yaml.FullLoader)
+    def _str_to_json(string: bytes) -> dict:
+        # Both orjson and json take utf-8 bytes directly and skip surrounding whitespace themselves.
+        converted_string = _json_loads(string)
 
         return converted_string
 
     @staticmethod
+    def _get_resource_script(page_content: bytes) -> bytes:
+        """Return the body of the embed page's resource script, only building the soup if the fast path misses."""
+
+        mark = page_content.find(_RESOURCE_SCRIPT_MARK)
+        if mark != -1:
+            start = page_content.find(b'>', mark) + 1
+            end = page_content.find(b'</script>', start)
+            if start != 0 and end != -1:
+                return page_content[start:end]
+        if b'resource' not in page_content:
+            # Not-found pages have no resource script at all, so don't build a soup only to miss it.
+            raise ValueError("The page doesn't contain a resource script.")
+        return BeautifulSoup(page_content, "lxml").find("script", {"id": "resource"}).contents[0].encode('utf-8')
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
     def _ms_to_readable(millis: int) -> str:
-        seconds = int(millis / 1000) % 60
-        minutes = int(millis / (1000 * 60)) % 60
-        hours = int(millis / (1000 * 60 * 60)) % 24
+        minutes, seconds = divmod(max(millis, 0) // 1000, 60)
+        hours, minutes = divmod(minutes, 60)
         if hours == 0:
-            return "%d:%d" % (minutes, seconds)
+            return "%d:%02d" % (minutes, seconds)
         else:
-            return "%d:%d:%d" % (hours, minutes, seconds)
+            return "%d:%02d:%02d" % (hours, minutes, seconds)
 
     @staticmethod
+    @lru_cache(maxsize=2048)
     def _turn_url_to_embed(url: str) -> str:
         if 'embed' in url:
             return url
         else:
             return url.replace('/track/', '/embed/track/')
 
+    @staticmethod
+    def _clean_file_name(file_name: str) -> str:
+        # str.join on a generator builds a list first anyway, so hand it one directly.
+        return "".join([x for x in file_name if x.isalnum()])
+
     def _image_downloader(self, url: str, file_name: str, path: str = '') -> str:
         request = self.session.get(url=url, stream=True)
-        ext = request.headers['content-type'].split('/')[
-            -1]  # converts response headers mime type to an extension (may not work with everything)
+        ext = request.headers['content-type'].rpartition('/')[
+            2]  # converts response headers mime type to an extension (may not work with everything)
         if path == '':
             pass
         else:
             path = path + '//'
-        file_name = "".join(x for x in file_name if x.isalnum())
+        file_name = self._clean_file_name(file_name=file_name)
         saving_directory = path + file_name + '.' + ext
         with open(saving_directory,
                   'wb') as f:  # open the file to write as binary - replace 'wb' with 'w' for text files
@@ -97,43 +148,60 @@ class Scraper:
         else:
             path = path + '//'
 
-        file_name = file_name = "".join(x for x in file_name if x.isalnum())
+        file_name = self._clean_file_name(file_name=file_name)
         saving_directory = path + file_name + '.mp3'
-        song = self.session.get(url=url, stream=True)
-        with open(saving_directory, 'wb') as f:
-            f.write(song.content)
+        # ThreadPoolExecutor only starts a thread on submit, so without a cover this stays single threaded.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            song = self.session.get(url=url, stream=True)
+            if with_cover:
+                # The mp3 request went through, so fetch the cover while the mp3 body downloads.
+                image_future = executor.submit(self._image_downloader, url=cover_url, file_name=file_name, path=path)
+            try:
+                with open(saving_directory, 'wb') as f:
+                    f.write(song.content)
+            except Exception:
+                if with_cover:
+                    try:
+                        os.remove(path=image_future.result())
+                    except Exception:
+                        pass  # the cover failed as well, so there is nothing to clean up
+                raise
 
         if with_cover:
-            audio_file = eyed3.load(saving_directory)
-            if audio_file.tag is None:
-                audio_file.initTag()
+            image_path = image_future.result()
+            try:
+                audio_file = eyed3.load(saving_directory)
+                if audio_file.tag is None:
+                    audio_file.initTag()
 
-            image_path = self._image_downloader(url=cover_url, file_name=file_name, path=path)
-            audio_file.tag.images.set(3, open(image_path, 'rb').read(), 'image/')
-            audio_file.tag.save()
-            os.remove(path=image_path)
+                with open(image_path, 'rb') as image:
+                    audio_file.tag.images.set(3, image.read(), 'image/')
+                audio_file.tag.save()
+            finally:
+                os.remove(path=image_path)
 
         return saving_directory
 
     def get_track_url_info(self, url: str) -> dict:
         try:
-            page_content = self.session.get(url=self._turn_url_to_embed(url=url), stream=True).content
+            page_content = self._get_embed_page(url=url)
             try:
-                bs_instance = BeautifulSoup(page_content, "lxml")
-                print(bs_instance)
-                url_information = self._str_to_json(string=bs_instance.find("script", {"id": "resource"}).contents[0])
+                url_information = self._str_to_json(string=self._get_resource_script(page_content=page_content))
                 title = url_information['name']
                 preview_mp3 = url_information['preview_url']
                 duration = self._ms_to_readable(millis=int(url_information['duration_ms']))
-                artist_name = url_information['artists'][0]['name']
-                artist_url = url_information['artists'][0]['external_urls']['spotify']
-                album_title = url_information['album']['name']
-                album_cover_url = url_information['album']['images'][0]['url']
-                album_cover_height = url_information['album']['images'][0]['height']
-                album_cover_width = url_information['album']['images'][0]['width']
-                release_date = url_information['album']['release_date']
-                total_tracks = url_information['album']['total_tracks']
-                type_ = url_information['album']['type']
+                artist = url_information['artists'][0]
+                album = url_information['album']
+                album_cover = album['images'][0]
+                artist_name = artist['name']
+                artist_url = artist['external_urls']['spotify']
+                album_title = album['name']
+                album_cover_url = album_cover['url']
+                album_cover_height = album_cover['height']
+                album_cover_width = album_cover['width']
+                release_date = album['release_date']
+                total_tracks = album['total_tracks']
+                type_ = album['type']
 
                 return {
                     'title': title,
@@ -165,6 +233,14 @@ class Scraper:
         except:
             raise
 
+    def get_tracks_url_info(self, urls: list, max_workers: int = 8) -> list:
+        if isinstance(urls, str):
+            raise TypeError("urls should be a list of track urls, not a single url.")
+
+        # Every lookup waits on its own request, so fetch them side by side and keep the input order.
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.get_track_url_info, urls))
+
     def download_cover(self, url: str, path: str = '') -> str:
         try:
             if 'playlist' in url:
@@ -187,11 +263,10 @@ class Scraper:
 
 
             else:
-                page_content = self.session.get(url=self._turn_url_to_embed(url=url), stream=True).content
+                page_content = self._get_embed_page(url=url)
                 try:
-                    bs_instance = BeautifulSoup(page_content, "lxml")
                     url_information = self._str_to_json(
-                        string=bs_instance.find("script", {"id": "resource"}).contents[0])
+                        string=self._get_resource_script(page_content=page_content))
                     title = url_information['name']
                     album_title = url_information['album']['name']
                     album_cover_url = url_information['album']['images'][0]['url']
@@ -215,10 +290,9 @@ class Scraper:
 
     def download_preview_mp3(self, url: str, path: str = '', with_cover: bool = False) -> str:
         try:
-            page_content = self.session.get(url=self._turn_url_to_embed(url=url), stream=True).content
+            page_content = self._get_embed_page(url=url)
             try:
-                bs_instance = BeautifulSoup(page_content, "lxml")
-                url_information = self._str_to_json(string=bs_instance.find("script", {"id": "resource"}).contents[0])
+                url_information = self._str_to_json(string=self._get_resource_script(page_content=page_content))
                 title = url_information['name']
                 album_title = url_information['album']['name']
                 preview_mp3 = url_information['preview_url']
@@ -244,10 +318,20 @@ class Scraper:
         except:
             raise
 
+    @staticmethod
+    def _iter_playlist_tracks(tracks: Tag) -> Iterator[dict]:
+        # Every track row holds three dir="auto" spans: name, singer and album.
+        spans = iter(tracks.find_all('span', {"dir": "auto"}))
+        duration_list = tracks.find_all('span', {'class': 'total-duration'})
+        for counter, (track_name, track_singer, track_album) in enumerate(zip(spans, spans, spans)):
+            yield {'track_name': track_name.text, 'track_singer': track_singer.text,
+                   'track_album': track_album.text,
+                   'duration': duration_list[counter].text if counter < len(duration_list) else None,
+                   'ERROR': None, }
+
     def get_playlist_url_info(self, url: str) -> dict:
         try:
-            if '?si' in url:
-                url = url.split('?si')[0]
+            url = url.partition('?si')[0]
             page = self.session.get(url=url, stream=True).content
             try:
                 bs_instance = BeautifulSoup(page, "lxml")
@@ -255,26 +339,9 @@ class Scraper:
                 playlist_description = bs_instance.find('meta', {"name": "description"})['content']
                 author_url = bs_instance.find('meta', property='music:creator')['content']
                 author = author_url.split('/')[4]
-                tracks_list = []
                 album_title = bs_instance.find('title').text
                 cover_url = bs_instance.find('meta', property='og:image')['content']
-                temp_list = []
-                counter = 0
-                duration_list = tracks.find_all('span', {'class': 'total-duration'})
-                for item in tracks.find_all('span', {"dir": "auto"}):
-                    temp_list.append(item)
-                    if len(temp_list) == 3:
-                        try:
-                            temp = {'track_name': temp_list[0].text, 'track_singer': temp_list[1].text,
-                                    'track_album': temp_list[2].text,
-                                    'duration': duration_list[counter].text, 'ERROR': None, }
-                        except:
-                            temp = {'track_name': temp_list[0].text, 'track_singer': temp_list[1].text,
-                                    'track_album': temp_list[2].text,
-                                    'duration': None, 'ERROR': None, }
-                        tracks_list.append(temp)
-                        temp_list = []
-                        counter += 1
+                tracks_list = list(self._iter_playlist_tracks(tracks=tracks))
 
                 data = {'album_title': album_title, 'cover_url': cover_url, 'author': author, 'author_url': author_url,
                         'playlist_description': playlist_description,
@@ -47,7 +47,6 @@ setup(
                       'pyparsing',
                       'pyppeteer',
                       'pyquery',
-                      'PyYAML',
                       'requests',
                       'six',
                       'soupsieve',
@@ -56,6 +55,7 @@ setup(
                       'w3lib',
                       'websockets',
                       ],
+    extras_require={'fast': ['orjson']},
 
     project_urls={
         'Bug Reports': 'https://github.com/AliAkhtari78/SpotifyScraper/issues',
@@ -0,0 +1,106 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from SpotifyScraper.scraper import Scraper
+
+PAGE = (b'<html><head><script>var x = 1;</script></head><body>'
+        b'<script id="resource" type="application/json">{"name": "song"}</script>'
+        b'<div class="content">tail</div>' + b'<p>padding</p>' * 4096 + b'</body></html>')
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        KeepAliveHandler.connections += 1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def embed_server():
+    KeepAliveHandler.connections = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:%d' % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_embed_page_fetches_reuse_the_pooled_connection(embed_server):
+    scraper = Scraper(session=requests.Session())
+
+    for number in range(5):
+        page_content = scraper._get_embed_page(url='%s/embed/track/%d' % (embed_server, number))
+        assert scraper._get_resource_script(page_content=page_content) == b'{"name": "song"}'
+
+    assert KeepAliveHandler.connections == 1
+
+
+def track_page(name: str) -> bytes:
+    return (b'<script id="resource" type="application/json">{"name": "%s", "preview_url": null, "duration_ms": 61000, '
+            b'"artists": [{"name": "artist", "external_urls": {"spotify": "artist_url"}}], '
+            b'"album": {"name": "album", "images": [{"url": "cover", "height": 640, "width": 640}], '
+            b'"release_date": "2020", "total_tracks": 1, "type": "album"}}</script>' % name.encode())
+
+
+class FakeResponse:
+    def __init__(self, content: bytes, status_code: int = 200):
+        self.content = content
+        self.status_code = status_code
+        self.ok = status_code < 400
+
+
+class FakeSession:
+    def __init__(self, pages: dict):
+        self.pages = pages
+
+    def get(self, url: str, **kwargs):
+        return self.pages[url]
+
+
+def test_get_tracks_url_info_keeps_order_and_reports_errors_per_track():
+    session = FakeSession(pages={
+        'https://open.spotify.com/embed/track/%d' % number: FakeResponse(content=track_page(name='track %d' % number))
+        for number in range(6)
+    })
+    session.pages['https://open.spotify.com/embed/track/broken'] = FakeResponse(content=b'<html></html>', status_code=500)
+    urls = ['https://open.spotify.com/track/%d' % number for number in (5, 3, 0)]
+    urls.insert(1, 'https://open.spotify.com/track/broken')
+
+    tracks = Scraper(session=session).get_tracks_url_info(urls=urls, max_workers=4)
+
+    assert [track.get('title') for track in tracks] == ['track 5', None, 'track 3', 'track 0']
+    assert tracks[0]['duration'] == '1:01'
+    assert tracks[0]['ERROR'] is None
+    assert tracks[1] == {'ERROR': 'The provided url is malformed.'}
+
+
+def test_get_tracks_url_info_rejects_a_single_url():
+    with pytest.raises(TypeError):
+        Scraper(session=FakeSession(pages={})).get_tracks_url_info(urls='https://open.spotify.com/track/0')
+
+
+def test_get_tracks_url_info_leaves_the_session_adapters_alone():
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=2)
+    session.mount('https://', adapter)
+    session.get = FakeSession(pages={'https://open.spotify.com/embed/track/0': FakeResponse(content=track_page(name='a'))}).get
+
+    Scraper(session=session).get_tracks_url_info(urls=['https://open.spotify.com/track/0'], max_workers=16)
+
+    assert session.get_adapter(url='https://open.spotify.com') is adapter